@@ -4,12 +4,30 @@ from credit_card_segmentation.utils.data_loader import (
     get_numeric_features,
     get_categorical_features
 )
+from credit_card_segmentation.utils.segment_store import (
+    write_segment_store,
+    SegmentStore
+)
 from credit_card_segmentation.src.feature_engineering import prepare_features
 from credit_card_segmentation.src.clustering import (
     find_optimal_clusters,
     perform_clustering,
     get_cluster_statistics
 )
+from credit_card_segmentation.src.hierarchical import (
+    perform_hierarchical_clustering,
+    get_hierarchical_statistics
+)
+from credit_card_segmentation.src.stability import (
+    assess_cluster_stability,
+    get_stability_summary
+)
+from credit_card_segmentation.src.pipeline import (
+    run_analysis,
+    run_batch,
+    read_manifest,
+    expand_inputs
+)
 from credit_card_segmentation.utils.plotting import (
     set_plotting_style,
     plot_cluster_distributions,
@@ -23,10 +41,20 @@ __all__ = [
     'load_customer_data',
     'get_numeric_features',
     'get_categorical_features',
+    'write_segment_store',
+    'SegmentStore',
     'prepare_features',
     'find_optimal_clusters',
     'perform_clustering',
     'get_cluster_statistics',
+    'perform_hierarchical_clustering',
+    'get_hierarchical_statistics',
+    'assess_cluster_stability',
+    'get_stability_summary',
+    'run_analysis',
+    'run_batch',
+    'read_manifest',
+    'expand_inputs',
     'set_plotting_style',
     'plot_cluster_distributions',
     'plot_cluster_relationships',
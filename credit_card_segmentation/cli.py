@@ -2,17 +2,17 @@
 import click
 import pandas as pd
 from pathlib import Path
+from .src.pipeline import MEMORY_PER_FILE_BYTE
 from . import (
     load_customer_data,
     prepare_features,
-    find_optimal_clusters,
     perform_clustering,
-    get_cluster_statistics,
-    set_plotting_style,
-    plot_cluster_distributions,
-    plot_cluster_relationships,
-    plot_categorical_distributions,
-    plot_elbow_curve
+    assess_cluster_stability,
+    get_stability_summary,
+    run_analysis,
+    run_batch,
+    read_manifest,
+    expand_inputs
 )
 
 @click.group()
@@ -24,66 +24,121 @@ def cli():
 @click.argument('data_path', type=click.Path(exists=True))
 @click.option('--n-clusters', default=8, help='Number of clusters to create')
 @click.option('--output-dir', default='outputs', help='Directory to save outputs')
-def analyze(data_path: str, n_clusters: int, output_dir: str):
+@click.option('--sub-clusters', is_flag=True,
+              help='Also split each cluster into second-level segments')
+@click.option('--max-sub-clusters', default=10,
+              help='Maximum number of sub-clusters to try per cluster')
+@click.option('--n-jobs', default=None, type=int,
+              help='Number of worker processes for sub-clustering')
+def analyze(data_path: str, n_clusters: int, output_dir: str, sub_clusters: bool,
+            max_sub_clusters: int, n_jobs: int):
     """Perform customer segmentation analysis.
     
     Args:
         data_path: Path to the CSV file containing customer data
         n_clusters: Number of clusters to create
         output_dir: Directory to save outputs
+        sub_clusters: Whether to split each cluster into sub-clusters
+        max_sub_clusters: Maximum number of sub-clusters per cluster
+        n_jobs: Number of worker processes for sub-clustering
     """
-    # Create output directory
+    run_analysis(data_path, output_dir, n_clusters=n_clusters,
+                 sub_clusters=sub_clusters, max_sub_clusters=max_sub_clusters,
+                 n_jobs=n_jobs, log=click.echo)
+    
     output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
+    click.echo(f"Analysis complete! Results saved to {output_path}")
+
+@cli.command()
+@click.argument('inputs', nargs=-1)
+@click.option('--manifest', type=click.Path(exists=True),
+              help='File listing one input path or glob pattern per line')
+@click.option('--n-clusters', default=8, help='Number of clusters to create')
+@click.option('--output-dir', default='outputs', help='Directory to save outputs')
+@click.option('--sub-clusters', is_flag=True,
+              help='Also split each cluster into second-level segments')
+@click.option('--max-sub-clusters', default=10,
+              help='Maximum number of sub-clusters to try per cluster')
+@click.option('--n-jobs', default=None, type=int, help='Number of worker processes')
+@click.option('--memory-budget', default=None, type=float,
+              help='Total memory in MB for portfolios running at the same time')
+@click.option('--memory-factor', default=MEMORY_PER_FILE_BYTE, type=float,
+              help='Estimated bytes of memory per byte of input CSV')
+def batch(inputs: tuple, manifest: str, n_clusters: int, output_dir: str,
+          sub_clusters: bool, max_sub_clusters: int, n_jobs: int,
+          memory_budget: float, memory_factor: float):
+    """Perform segmentation analysis for many portfolios at once.
     
-    # Load and prepare data
+    Args:
+        inputs: Paths or glob patterns of CSV files, one per portfolio
+        manifest: File listing further paths or glob patterns
+        n_clusters: Number of clusters to create
+        output_dir: Directory to save outputs
+        sub_clusters: Whether to split each cluster into sub-clusters
+        max_sub_clusters: Maximum number of sub-clusters per cluster
+        n_jobs: Number of worker processes
+        memory_budget: Total memory in MB for running portfolios
+        memory_factor: Estimated bytes of memory per byte of input CSV
+    """
+    patterns = list(inputs) + (read_manifest(manifest) if manifest else [])
+    data_paths = expand_inputs(patterns)
+    
+    click.echo(f"Analyzing {len(data_paths)} portfolios...")
+    try:
+        summary = run_batch(data_paths, output_dir, n_clusters=n_clusters,
+                            sub_clusters=sub_clusters,
+                            max_sub_clusters=max_sub_clusters, n_jobs=n_jobs,
+                            memory_budget=memory_budget,
+                            memory_per_file_byte=memory_factor, log=click.echo)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    
+    failed = (summary['status'] != 'ok').sum()
+    click.echo(f"Batch complete with {failed} failures! Results saved to {output_dir}")
+
+@cli.command()
+@click.argument('data_path', type=click.Path(exists=True))
+@click.option('--n-clusters', default=8, help='Number of clusters to assess')
+@click.option('--n-resamples', default=100, help='Maximum number of resamples')
+@click.option('--method', type=click.Choice(['bootstrap', 'subsample']),
+              default='bootstrap', help='Resampling method')
+@click.option('--n-jobs', default=None, type=int, help='Number of worker processes')
+@click.option('--tol', default=None, type=float,
+              help='Stop early once confidence intervals are narrower than this')
+@click.option('--output-dir', default='outputs', help='Directory to save outputs')
+def stability(data_path: str, n_clusters: int, n_resamples: int, method: str,
+              n_jobs: int, tol: float, output_dir: str):
+    """Assess stability of a segmentation across resamples.
+
+    Args:
+        data_path: Path to the CSV file containing customer data
+        n_clusters: Number of clusters to assess
+        n_resamples: Maximum number of resamples
+        method: Resampling method
+        n_jobs: Number of worker processes
+        tol: Confidence interval half-width for early stopping
+        output_dir: Directory to save outputs
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(exist_ok=True)
+
     click.echo("Loading and preparing data...")
     df = load_customer_data(data_path)
     df_prepared = prepare_features(df)
-    
-    # Find optimal clusters
-    click.echo("Finding optimal number of clusters...")
-    inertias = find_optimal_clusters(df_prepared.values, max_clusters=15)
-    
-    # Set plotting style
-    set_plotting_style()
-    
-    # Plot and save elbow curve
-    click.echo("Generating elbow curve...")
-    elbow_fig = plot_elbow_curve(inertias)
-    elbow_fig.savefig(output_path / 'elbow_curve.png')
-    
-    # Perform clustering
+
     click.echo(f"Performing clustering with {n_clusters} clusters...")
-    labels, model = perform_clustering(df_prepared.values, n_clusters=n_clusters)
-    
-    # Add cluster labels to original dataframe
-    df['CLUSTER'] = labels + 1
-    
-    # Generate and save visualizations
-    click.echo("Generating visualizations...")
-    numeric_cols = [col for col in df.select_dtypes(include=['number']).columns 
-                   if col not in ['customer_id', 'CLUSTER']]
-    
-    dist_fig = plot_cluster_distributions(df, numeric_cols)
-    dist_fig.savefig(output_path / 'cluster_distributions.png')
-    
-    rel_fig = plot_cluster_relationships(df)
-    rel_fig.savefig(output_path / 'cluster_relationships.png')
-    
-    cat_cols = df.select_dtypes(include=['object']).columns
-    cat_fig = plot_categorical_distributions(df, cat_cols)
-    cat_fig.savefig(output_path / 'categorical_distributions.png')
-    
-    # Generate cluster statistics
-    click.echo("Calculating cluster statistics...")
-    stats = get_cluster_statistics(df, labels)
-    stats.to_csv(output_path / 'cluster_statistics.csv')
-    
-    # Save clustered data
-    df.to_csv(output_path / 'clustered_data.csv', index=False)
-    
-    click.echo(f"Analysis complete! Results saved to {output_path}")
+    labels, _ = perform_clustering(df_prepared.values, n_clusters=n_clusters)
+
+    click.echo(f"Fitting up to {n_resamples} {method} resamples...")
+    ari_scores, jaccard_scores = assess_cluster_stability(
+        df_prepared.values, labels, n_resamples=n_resamples, method=method,
+        n_jobs=n_jobs, tol=tol
+    )
+    summary = get_stability_summary(ari_scores, jaccard_scores)
+    summary.to_csv(output_path / 'cluster_stability.csv')
+
+    click.echo(summary.to_string())
+    click.echo(f"Stability analysis complete! Results saved to {output_path}")
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -2,7 +2,7 @@
 import numpy as np
 import pandas as pd
 from sklearn.cluster import KMeans
-from typing import Tuple, List
+from typing import Tuple, List, Union
 
 def find_optimal_clusters(X: np.ndarray, max_clusters: int = 10) -> List[float]:
     """Calculate inertia for different numbers of clusters.
@@ -53,9 +53,29 @@ def get_cluster_statistics(df: pd.DataFrame, labels: np.ndarray) -> pd.DataFrame
     cluster_stats = df.groupby('Cluster')[numeric_cols].agg(['mean', 'std', 'count'])
     
     # Calculate mode for categorical columns
-    categorical_cols = df.select_dtypes(include=['object']).columns
-    if not categorical_cols.empty:
-        for col in categorical_cols:
-            cluster_stats[col, ''] = df.groupby('Cluster')[col].agg(lambda x: x.mode().iloc[0] if not x.mode().empty else None)
+    modes = get_categorical_modes(df, 'Cluster')
+    for col in modes.columns:
+        cluster_stats[col, ''] = modes[col]
+    
+    return cluster_stats
+
+def get_categorical_modes(df: pd.DataFrame,
+                          group_keys: Union[str, List[str]]) -> pd.DataFrame:
+    """Calculate the most frequent value of each categorical column per group.
     
-    return cluster_stats
\ No newline at end of file
+    Args:
+        df: Dataframe with features and group columns
+        group_keys: Column or columns to group by
+        
+    Returns:
+        pd.DataFrame: Mode of each categorical column, indexed by group
+    """
+    def mode(x: pd.Series):
+        modes = x.mode()
+        return modes.iloc[0] if not modes.empty else None
+
+    categorical_cols = df.select_dtypes(include=['object']).columns
+    grouped = df.groupby(group_keys)
+    return pd.DataFrame({
+        col: grouped[col].agg(mode) for col in categorical_cols
+    }, index=grouped.size().index)
\ No newline at end of file
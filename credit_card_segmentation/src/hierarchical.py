@@ -0,0 +1,188 @@
+"""Hierarchical sub-segmentation for credit card customer segmentation."""
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Tuple, List, Optional
+from threadpoolctl import threadpool_limits
+from credit_card_segmentation.src.clustering import (
+    find_optimal_clusters,
+    perform_clustering,
+    get_cluster_statistics,
+    get_categorical_modes
+)
+
+# Sweep inertias (None for a fixed k), labels, k and inertia of one cluster
+SubclusterResult = Tuple[Optional[List[float]], np.ndarray, int, float]
+
+def select_elbow(inertias: List[float]) -> int:
+    """Pick the number of clusters at the elbow of an inertia curve.
+
+    The elbow is the point furthest from the straight line joining the
+    first and last inertia values.
+
+    Args:
+        inertias: Inertia values for k = 1, 2, ...
+
+    Returns:
+        int: Number of clusters at the elbow
+    """
+    if len(inertias) < 3:
+        return len(inertias)
+    y = np.asarray(inertias, dtype=np.float64)
+    x = np.arange(1, len(y) + 1, dtype=np.float64)
+    # Normalize both axes so the distance is not dominated by inertia scale
+    x = (x - x[0]) / (x[-1] - x[0])
+    span = y[0] - y[-1]
+    y = (y - y[-1]) / span if span > 0 else np.zeros_like(y)
+    distance = np.abs(x + y - 1) / np.sqrt(2)
+    return int(np.argmax(distance)) + 1
+
+def _subcluster(X: np.ndarray, max_subclusters: int,
+                n_subclusters: Optional[int]) -> SubclusterResult:
+    """Sweep (unless k is fixed) and fit the sub-clusters of one cluster."""
+    if n_subclusters is not None:
+        inertias = None
+        k = min(n_subclusters, len(X))
+    else:
+        max_k = min(max_subclusters, len(X))
+        inertias = find_optimal_clusters(X, max_clusters=max_k)
+        k = select_elbow(inertias)
+    labels, model = perform_clustering(X, n_clusters=k)
+    return inertias, labels, k, model.inertia_
+
+def _fit_subclusters(shm_name: str, shape: Tuple[int, int], dtype: str,
+                     start: int, stop: int, max_subclusters: int,
+                     n_subclusters: Optional[int], threads: int) -> SubclusterResult:
+    """Sub-cluster one top-level cluster on its slice of the shared matrix."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Rows of one cluster are contiguous, so this is a view, not a copy
+        X = np.ndarray(shape, dtype=dtype, buffer=shm.buf)[start:stop]
+        with threadpool_limits(limits=threads):
+            return _subcluster(X, max_subclusters, n_subclusters)
+    finally:
+        shm.close()
+
+def _subcluster_in_pool(X_sorted: np.ndarray, offsets: np.ndarray,
+                        max_subclusters: int, n_subclusters: Optional[int],
+                        n_jobs: int) -> List[SubclusterResult]:
+    """Sub-cluster every cluster block of X_sorted on a process pool."""
+    # Split the cores between workers so KMeans threads don't oversubscribe
+    threads = max(1, (os.cpu_count() or 1) // n_jobs)
+    shm = shared_memory.SharedMemory(create=True, size=max(X_sorted.nbytes, 1))
+    try:
+        shared_X = np.ndarray(X_sorted.shape, dtype=X_sorted.dtype, buffer=shm.buf)
+        shared_X[:] = X_sorted
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(_fit_subclusters, shm.name, X_sorted.shape,
+                                X_sorted.dtype.str, int(offsets[i]),
+                                int(offsets[i + 1]), max_subclusters,
+                                n_subclusters, threads)
+                for i in range(len(offsets) - 1)
+            ]
+            return [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+def perform_hierarchical_clustering(
+    X: np.ndarray,
+    labels: np.ndarray,
+    max_subclusters: int = 10,
+    n_subclusters: Optional[int] = None,
+    n_jobs: Optional[int] = None
+) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Split each top-level cluster into second-level segments.
+
+    Rows are reordered once so every cluster is a contiguous block of a
+    shared-memory matrix; the per-cluster sweeps and fits then run on a
+    process pool, each worker reading its block as a view. With a single
+    job the fits run in this process, without a pool.
+
+    Args:
+        X: Input features array
+        labels: Top-level cluster labels from perform_clustering
+        max_subclusters: Maximum number of sub-clusters to sweep per cluster
+        n_subclusters: Fixed number of sub-clusters per cluster, which skips
+            the sweep; if None it is picked at the elbow of each cluster's
+            inertia curve
+        n_jobs: Number of worker processes, defaults to the CPU count
+
+    Returns:
+        Tuple[np.ndarray, pd.DataFrame]: Array of shape (n_samples, 2) with
+        top-level and sub-cluster labels, and per-cluster sizes, chosen
+        number of sub-clusters, inertia of the fit and sweep inertias (None
+        when n_subclusters is given)
+
+    Raises:
+        ValueError: If n_subclusters is given and is less than 1
+    """
+    if n_subclusters is not None and n_subclusters < 1:
+        raise ValueError(f"n_subclusters must be at least 1, got {n_subclusters}")
+
+    labels = np.asarray(labels, dtype=np.int64)
+    order = np.argsort(labels, kind='stable')
+    X_sorted = np.ascontiguousarray(np.asarray(X, dtype=np.float64)[order])
+    clusters, counts = np.unique(labels, return_counts=True)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    if n_jobs == 1:
+        results = [
+            _subcluster(X_sorted[offsets[i]:offsets[i + 1]], max_subclusters,
+                        n_subclusters)
+            for i in range(len(clusters))
+        ]
+    else:
+        results = _subcluster_in_pool(X_sorted, offsets, max_subclusters,
+                                      n_subclusters, n_jobs)
+
+    sub_labels = np.empty(len(labels), dtype=np.int64)
+    rows = []
+    for i, (cluster, result) in enumerate(zip(clusters, results)):
+        inertias, cluster_sub_labels, k, inertia = result
+        sub_labels[order[offsets[i]:offsets[i + 1]]] = cluster_sub_labels
+        rows.append({
+            'Cluster': cluster + 1,
+            'size': int(counts[i]),
+            'n_subclusters': k,
+            'inertia': inertia,
+            'inertias': inertias
+        })
+
+    level_stats = pd.DataFrame(rows).set_index('Cluster')
+    return np.column_stack([labels, sub_labels]), level_stats
+
+def get_hierarchical_statistics(
+    df: pd.DataFrame,
+    hierarchical_labels: np.ndarray
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Calculate statistics for both levels of a hierarchical segmentation.
+
+    Args:
+        df: Original dataframe with features
+        hierarchical_labels: Labels from perform_hierarchical_clustering
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Statistics per top-level cluster
+        and per (cluster, sub-cluster) pair, both 1-based
+    """
+    cluster_stats = get_cluster_statistics(df, hierarchical_labels[:, 0])
+
+    df = df.copy()
+    df['Cluster'] = hierarchical_labels[:, 0] + 1
+    df['Subcluster'] = hierarchical_labels[:, 1] + 1
+    keys = ['Cluster', 'Subcluster']
+
+    numeric_cols = [col for col in df.select_dtypes(include=[np.number]).columns
+                    if col not in keys]
+    subcluster_stats = df.groupby(keys)[numeric_cols].agg(['mean', 'std', 'count'])
+
+    modes = get_categorical_modes(df, keys)
+    for col in modes.columns:
+        subcluster_stats[col, ''] = modes[col]
+
+    return cluster_stats, subcluster_stats
@@ -0,0 +1,361 @@
+"""End-to-end analysis pipeline for credit card customer segmentation."""
+import glob
+import os
+import sys
+import time
+import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from threadpoolctl import threadpool_limits
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+from credit_card_segmentation.utils.data_loader import load_customer_data
+from credit_card_segmentation.utils.segment_store import write_segment_store
+from credit_card_segmentation.utils.plotting import (
+    set_plotting_style,
+    plot_cluster_distributions,
+    plot_cluster_relationships,
+    plot_categorical_distributions,
+    plot_elbow_curve
+)
+from credit_card_segmentation.src.feature_engineering import prepare_features
+from credit_card_segmentation.src.clustering import (
+    find_optimal_clusters,
+    perform_clustering,
+    get_cluster_statistics
+)
+from credit_card_segmentation.src.hierarchical import (
+    perform_hierarchical_clustering,
+    get_hierarchical_statistics
+)
+
+# Default estimate of the in-memory size of a portfolio relative to its CSV
+# size; compare with peak_rss_mb in the batch summary to tune it
+MEMORY_PER_FILE_BYTE = 10
+
+def run_analysis(data_path: str, output_dir: str, n_clusters: int = 8,
+                 max_clusters: int = 15, sub_clusters: bool = False,
+                 max_sub_clusters: int = 10, n_jobs: Optional[int] = None,
+                 log: Callable[[str], None] = print) -> Dict[str, float]:
+    """Run the full segmentation analysis for one portfolio.
+
+    Args:
+        data_path: Path to the CSV file containing customer data
+        output_dir: Directory to save outputs
+        n_clusters: Number of clusters to create
+        max_clusters: Maximum number of clusters for the elbow sweep
+        sub_clusters: Whether to split each cluster into sub-clusters
+        max_sub_clusters: Maximum number of sub-clusters per cluster
+        n_jobs: Number of worker processes for sub-clustering
+        log: Function called with progress messages
+
+    Returns:
+        Dict[str, float]: Number of rows and seconds spent in each stage
+        ('subcluster' only when sub_clusters is set)
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    def lap(stage: str):
+        nonlocal start
+        now = time.perf_counter()
+        timings[stage] = now - start
+        start = now
+
+    # Create output directory
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # Load and prepare data
+    log("Loading and preparing data...")
+    df = load_customer_data(data_path)
+    lap('load')
+    df_prepared = prepare_features(df)
+    lap('prepare')
+
+    # Find optimal clusters
+    log("Finding optimal number of clusters...")
+    inertias = find_optimal_clusters(df_prepared.values, max_clusters=max_clusters)
+    lap('sweep')
+
+    # Perform clustering
+    log(f"Performing clustering with {n_clusters} clusters...")
+    labels, model = perform_clustering(df_prepared.values, n_clusters=n_clusters)
+
+    # Add cluster labels to original dataframe
+    df['CLUSTER'] = labels + 1
+    lap('fit')
+
+    # Split each cluster into second-level segments
+    if sub_clusters:
+        log("Performing sub-clustering within each cluster...")
+        hierarchical_labels, _ = perform_hierarchical_clustering(
+            df_prepared.values, labels, max_subclusters=max_sub_clusters,
+            n_jobs=n_jobs
+        )
+        lap('subcluster')
+
+    # Set plotting style
+    set_plotting_style()
+
+    # Plot and save elbow curve
+    log("Generating elbow curve...")
+    elbow_fig = plot_elbow_curve(inertias)
+    elbow_fig.savefig(output_path / 'elbow_curve.png')
+
+    # Generate and save visualizations
+    log("Generating visualizations...")
+    numeric_cols = [col for col in df.select_dtypes(include=['number']).columns
+                   if col not in ['customer_id', 'CLUSTER']]
+
+    dist_fig = plot_cluster_distributions(df, numeric_cols)
+    dist_fig.savefig(output_path / 'cluster_distributions.png')
+
+    rel_fig = plot_cluster_relationships(df)
+    rel_fig.savefig(output_path / 'cluster_relationships.png')
+
+    cat_cols = df.select_dtypes(include=['object']).columns
+    cat_fig = plot_categorical_distributions(df, cat_cols)
+    cat_fig.savefig(output_path / 'categorical_distributions.png')
+    plt.close('all')
+
+    # Generate cluster statistics
+    log("Calculating cluster statistics...")
+    stats = get_cluster_statistics(df, labels)
+    stats.to_csv(output_path / 'cluster_statistics.csv')
+
+    # Save second-level statistics and labels
+    if sub_clusters:
+        _, sub_stats = get_hierarchical_statistics(
+            df.drop(columns=['CLUSTER']), hierarchical_labels
+        )
+        sub_stats.to_csv(output_path / 'subcluster_statistics.csv')
+        df['SUBCLUSTER'] = hierarchical_labels[:, 1] + 1
+
+    # Save clustered data
+    df.to_csv(output_path / 'clustered_data.csv', index=False)
+    write_segment_store(df, output_path / 'segment_store')
+    lap('report')
+
+    timings['n_rows'] = len(df)
+    return timings
+
+def read_manifest(manifest_path: str) -> List[str]:
+    """Read input file paths from a manifest.
+
+    The manifest lists one path or glob pattern per line; blank lines and
+    lines starting with '#' are ignored. Relative paths are resolved
+    against the manifest's directory.
+
+    Args:
+        manifest_path: Path to the manifest file
+
+    Returns:
+        List[str]: Paths or patterns listed in the manifest
+    """
+    base = Path(manifest_path).parent
+    entries = []
+    with open(manifest_path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                entries.append(str(base / line))
+    return entries
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    """Expand paths and glob patterns into a de-duplicated list of files.
+
+    Args:
+        patterns: File paths or glob patterns
+
+    Returns:
+        List[str]: Matching files in the order first seen
+    """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def _portfolio_names(paths: List[str]) -> List[str]:
+    """Give each input file a unique output directory name."""
+    names = []
+    for path in paths:
+        stem = Path(path).stem
+        name, i = stem, 2
+        while name in names:
+            name, i = f'{stem}_{i}', i + 1
+        names.append(name)
+    return names
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the current process in MB, if available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+def _run_portfolio(data_path: str, output_dir: str, n_clusters: int,
+                   max_clusters: int, sub_clusters: bool,
+                   max_sub_clusters: int, threads: int) -> Dict[str, float]:
+    """Run one portfolio inside a batch worker process."""
+    matplotlib.use('Agg')
+    with threadpool_limits(limits=threads):
+        timings = run_analysis(data_path, output_dir, n_clusters=n_clusters,
+                               max_clusters=max_clusters,
+                               sub_clusters=sub_clusters,
+                               max_sub_clusters=max_sub_clusters, n_jobs=1,
+                               log=lambda message: None)
+    timings['peak_rss_mb'] = _peak_rss_mb()
+    return timings
+
+def run_batch(data_paths: List[str], output_dir: str, n_clusters: int = 8,
+              max_clusters: int = 15, sub_clusters: bool = False,
+              max_sub_clusters: int = 10, n_jobs: Optional[int] = None,
+              memory_budget: Optional[float] = None,
+              memory_per_file_byte: float = MEMORY_PER_FILE_BYTE,
+              log: Callable[[str], None] = print) -> pd.DataFrame:
+    """Run the analysis for many portfolios on one shared process pool.
+
+    Portfolios are started largest first. Each one is assigned an estimated
+    memory budget of its file size times memory_per_file_byte, and a new
+    portfolio only starts while the budgets of the running ones fit in the
+    total memory budget; a portfolio larger than the whole budget runs on
+    its own. The summary records each estimate next to the worker's peak
+    RSS so the factor can be checked and tuned. Peak RSS is the worker
+    process's high-water mark, so it is an upper bound when that worker
+    ran other portfolios before.
+
+    Failures are recorded in the summary instead of stopping the batch. If
+    a worker process dies (e.g. killed for running out of memory), the pool
+    is rebuilt and the portfolios that were running are retried one at a
+    time; only a portfolio that kills its worker on its own is marked as
+    failed. The summary is written even if the batch is interrupted.
+
+    Args:
+        data_paths: Paths to the CSV files, one per portfolio
+        output_dir: Directory to save outputs; each portfolio gets a
+            subdirectory named after its file
+        n_clusters: Number of clusters to create
+        max_clusters: Maximum number of clusters for the elbow sweep
+        sub_clusters: Whether to split each cluster into sub-clusters
+        max_sub_clusters: Maximum number of sub-clusters per cluster
+        n_jobs: Number of worker processes, defaults to the CPU count
+        memory_budget: Total memory in MB for running portfolios, None for
+            no limit
+        memory_per_file_byte: Estimated bytes of memory per byte of CSV
+        log: Function called with progress messages
+
+    Returns:
+        pd.DataFrame: Run summary with one row per portfolio
+
+    Raises:
+        ValueError: If no paths are given or a path is not a file
+    """
+    if not data_paths:
+        raise ValueError("No input files given")
+    missing = [path for path in data_paths if not os.path.isfile(path)]
+    if missing:
+        raise ValueError(f"Files not found: {', '.join(missing)}")
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    cpu_count = os.cpu_count() or 1
+    n_jobs = max(1, min(n_jobs or cpu_count, len(data_paths)))
+    # Split the cores between workers so native thread pools don't oversubscribe
+    threads = max(1, cpu_count // n_jobs)
+    budget = memory_budget * 2 ** 20 if memory_budget is not None else None
+
+    names = _portfolio_names(data_paths)
+    paths = dict(zip(names, data_paths))
+    estimates = {name: os.path.getsize(path) * memory_per_file_byte
+                 for name, path in paths.items()}
+    # Pending entries are (name, alone); alone ones run with no other work
+    pending = [(name, False) for name in sorted(names, key=lambda n: -estimates[n])]
+
+    rows = {}
+    running = {}
+    running_alone = False
+    in_use = 0
+    started = {}
+    batch_start = time.perf_counter()
+
+    def record(name: str, status: str, result: Optional[dict] = None):
+        row = {'portfolio': name, 'data_path': paths[name]}
+        row.update(result or {})
+        row['status'] = status
+        row['estimated_mb'] = estimates[name] / 2 ** 20
+        row['total'] = time.perf_counter() - started[name]
+        rows[name] = row
+        log(f"[{len(rows)}/{len(names)}] {name}: {status} ({row['total']:.1f}s)")
+
+    executor = ProcessPoolExecutor(max_workers=n_jobs)
+    try:
+        while pending or running:
+            # Admit as many pending portfolios as workers and memory allow
+            while pending and len(running) < n_jobs and not running_alone:
+                name, alone = pending[0]
+                fits = budget is None or in_use + estimates[name] <= budget
+                if running and (alone or not fits):
+                    break
+                pending.pop(0)
+                future = executor.submit(
+                    _run_portfolio, paths[name], str(output_path / name),
+                    n_clusters, max_clusters, sub_clusters, max_sub_clusters,
+                    threads)
+                running[future] = name
+                running_alone = alone
+                started[name] = time.perf_counter()
+                in_use += estimates[name]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            if any(isinstance(future.exception(), BrokenProcessPool)
+                   for future in done):
+                # Every running future fails once the pool breaks
+                done, _ = wait(running)
+
+            crashed = []
+            for future in done:
+                name = running.pop(future)
+                in_use -= estimates[name]
+                error = future.exception()
+                if isinstance(error, BrokenProcessPool):
+                    crashed.append(name)
+                elif error is not None:
+                    record(name, f'failed: {error}')
+                else:
+                    record(name, 'ok', future.result())
+            running_alone = running_alone and bool(running)
+
+            if crashed:
+                if len(crashed) == 1:
+                    record(crashed[0], 'failed: worker process died')
+                else:
+                    # Can't tell which one died, so retry each on its own
+                    log(f"Worker process died; retrying {', '.join(crashed)} "
+                        "one at a time")
+                    pending[:0] = [(name, True) for name in crashed]
+                executor.shutdown(wait=True)
+                executor = ProcessPoolExecutor(max_workers=n_jobs)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        summary = pd.DataFrame([
+            rows.get(name, {'portfolio': name, 'data_path': paths[name],
+                            'status': 'not run'})
+            for name in names
+        ]).set_index('portfolio')
+        summary.to_csv(output_path / 'batch_summary.csv')
+
+    log(f"Batch of {len(names)} portfolios finished in "
+        f"{time.perf_counter() - batch_start:.1f}s")
+    return summary
@@ -0,0 +1,223 @@
+"""Cluster stability analysis for credit card customer segmentation."""
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+from sklearn.cluster import KMeans
+from threadpoolctl import threadpool_limits
+from typing import Tuple, Optional
+
+def contingency_table(labels_a: np.ndarray, labels_b: np.ndarray,
+                      n_a: int, n_b: int) -> np.ndarray:
+    """Build the contingency table of two labelings in a single bincount.
+
+    Args:
+        labels_a: First labeling, values in [0, n_a)
+        labels_b: Second labeling, values in [0, n_b)
+        n_a: Number of clusters in the first labeling
+        n_b: Number of clusters in the second labeling
+
+    Returns:
+        np.ndarray: Array of shape (n_a, n_b) with co-occurrence counts
+    """
+    flat = labels_a.astype(np.int64) * n_b + labels_b
+    return np.bincount(flat, minlength=n_a * n_b).reshape(n_a, n_b)
+
+def adjusted_rand_from_contingency(table: np.ndarray) -> float:
+    """Calculate the adjusted Rand index from a contingency table.
+
+    Args:
+        table: Contingency table of two labelings
+
+    Returns:
+        float: Adjusted Rand index
+    """
+    n = table.sum()
+    sum_cells = (table * (table - 1)).sum() / 2
+    sum_rows = (table.sum(axis=1) * (table.sum(axis=1) - 1)).sum() / 2
+    sum_cols = (table.sum(axis=0) * (table.sum(axis=0) - 1)).sum() / 2
+    total_pairs = n * (n - 1) / 2
+    expected = sum_rows * sum_cols / total_pairs if total_pairs else 0.0
+    max_index = (sum_rows + sum_cols) / 2
+    if max_index == expected:
+        return 1.0
+    return float((sum_cells - expected) / (max_index - expected))
+
+def jaccard_from_contingency(table: np.ndarray) -> np.ndarray:
+    """Calculate the best-match Jaccard similarity of each reference cluster.
+
+    Args:
+        table: Contingency table with reference clusters on the rows
+
+    Returns:
+        np.ndarray: Jaccard similarity per reference cluster
+    """
+    union = table.sum(axis=1)[:, None] + table.sum(axis=0)[None, :] - table
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaccard = np.where(union > 0, table / union, 0.0)
+    return jaccard.max(axis=1)
+
+def _fit_resample(shm_name: str, shape: Tuple[int, int], dtype: str,
+                  reference_labels: np.ndarray, n_clusters: int,
+                  method: str, sample_fraction: float, seed: int,
+                  threads: int) -> Tuple[float, np.ndarray]:
+    """Fit one resample against the shared feature matrix and score it."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        X = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        rng = np.random.default_rng(seed)
+        n_samples = shape[0]
+        if method == 'bootstrap':
+            draws = rng.integers(0, n_samples, n_samples)
+        else:
+            size = max(n_clusters, int(round(sample_fraction * n_samples)))
+            draws = rng.choice(n_samples, size=size, replace=False)
+        # Fit on the draws as drawn (duplicates kept), score each row once
+        model = KMeans(n_clusters=n_clusters, random_state=seed)
+        with threadpool_limits(limits=threads):
+            draw_labels = model.fit_predict(X[draws])
+        idx, first = np.unique(draws, return_index=True)
+        labels = draw_labels[first]
+    finally:
+        shm.close()
+    table = contingency_table(reference_labels[idx], labels,
+                              n_clusters, n_clusters)
+    return adjusted_rand_from_contingency(table), jaccard_from_contingency(table)
+
+def _ci_half_width(values: np.ndarray) -> np.ndarray:
+    """Half-width of the normal-approximation 95% confidence interval."""
+    if len(values) < 2:
+        return np.full(values.shape[1:], np.inf)
+    return 1.96 * values.std(axis=0, ddof=1) / np.sqrt(len(values))
+
+def assess_cluster_stability(
+    X: np.ndarray,
+    reference_labels: np.ndarray,
+    n_resamples: int = 100,
+    method: str = 'bootstrap',
+    sample_fraction: float = 0.8,
+    n_jobs: Optional[int] = None,
+    tol: Optional[float] = None,
+    min_resamples: int = 20,
+    random_state: int = 42
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Assess stability of a clustering by refitting K-means on resamples.
+
+    Resample fits run on a process pool that reads the feature matrix from
+    shared memory. Each resample is compared with the reference labels on
+    the distinct points it contains.
+
+    With early stopping, fits already running when the criterion is met
+    are waited for and their scores kept, so slightly more than the
+    stopping number of resamples may be returned. Which resamples finish
+    first depends on scheduling, so early-stopped results are not exactly
+    reproducible for a given random_state; without tol they are.
+
+    Args:
+        X: Input features array
+        reference_labels: Cluster labels for the rows of X, e.g. from
+            perform_clustering; any distinct values are accepted
+        n_resamples: Maximum number of resamples to fit
+        method: 'bootstrap' (with replacement) or 'subsample' (without)
+        sample_fraction: Fraction of rows drawn per subsample
+        n_jobs: Number of worker processes, defaults to the CPU count
+        tol: Stop early once every 95% confidence interval half-width
+            is below this value; None disables early stopping
+        min_resamples: Minimum number of resamples before stopping early
+        random_state: Seed for drawing resamples
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Adjusted Rand index per resample and
+        Jaccard similarity per resample and reference cluster, in sorted
+        order of the reference label values
+    """
+    if method not in ('bootstrap', 'subsample'):
+        raise ValueError(f"Unknown resampling method: {method}")
+    if n_resamples < 1:
+        raise ValueError(f"n_resamples must be at least 1, got {n_resamples}")
+
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    if len(reference_labels) != len(X):
+        raise ValueError(f"Got {len(reference_labels)} reference labels for "
+                         f"{len(X)} rows")
+    # Map arbitrary label values (e.g. 1-based CLUSTER) to 0..k-1
+    label_values, reference_labels = np.unique(reference_labels,
+                                               return_inverse=True)
+    n_clusters = len(label_values)
+    cpu_count = os.cpu_count() or 1
+    n_jobs = n_jobs or cpu_count
+    # Split the cores between workers so KMeans threads don't oversubscribe
+    threads = max(1, cpu_count // n_jobs)
+    seeds = np.random.SeedSequence(random_state).generate_state(n_resamples)
+
+    ari_scores, jaccard_scores = [], []
+    shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    try:
+        shared_X = np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)
+        shared_X[:] = X
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            pending = iter(seeds)
+            running = set()
+            while True:
+                # Keep n_jobs fits in flight so no worker waits on a slow one
+                for seed in pending:
+                    running.add(executor.submit(
+                        _fit_resample, shm.name, X.shape, X.dtype.str,
+                        reference_labels, n_clusters, method,
+                        sample_fraction, int(seed), threads))
+                    if len(running) >= n_jobs:
+                        break
+                if not running:
+                    break
+
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ari, jaccard = future.result()
+                    ari_scores.append(ari)
+                    jaccard_scores.append(jaccard)
+
+                if tol is not None and len(ari_scores) >= min_resamples:
+                    widths = np.concatenate([
+                        np.atleast_1d(_ci_half_width(np.array(ari_scores))),
+                        _ci_half_width(np.vstack(jaccard_scores))
+                    ])
+                    if np.all(widths < tol):
+                        break
+
+            # Fits still running after early stopping can't be interrupted;
+            # wait for them and keep their scores rather than discard them
+            for future in running:
+                ari, jaccard = future.result()
+                ari_scores.append(ari)
+                jaccard_scores.append(jaccard)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return np.array(ari_scores), np.vstack(jaccard_scores)
+
+def get_stability_summary(ari_scores: np.ndarray,
+                          jaccard_scores: np.ndarray) -> pd.DataFrame:
+    """Summarize resample scores with means and 95% confidence intervals.
+
+    Args:
+        ari_scores: Adjusted Rand index per resample
+        jaccard_scores: Jaccard similarity per resample and cluster
+
+    Returns:
+        pd.DataFrame: Jaccard statistics per cluster (1-based) followed by
+        an 'ARI' row for the overall adjusted Rand index
+    """
+    values = np.column_stack([jaccard_scores, ari_scores])
+    mean = values.mean(axis=0)
+    half_width = _ci_half_width(values)
+    index = pd.Index(
+        list(range(1, jaccard_scores.shape[1] + 1)) + ['ARI'], name='Cluster'
+    )
+    return pd.DataFrame({
+        'mean': mean,
+        'ci_lower': mean - half_width,
+        'ci_upper': mean + half_width,
+        'n_resamples': len(ari_scores)
+    }, index=index)
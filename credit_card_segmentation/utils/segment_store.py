@@ -0,0 +1,208 @@
+"""Cluster-sorted columnar segment store for credit card customer segmentation."""
+import json
+import operator
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+METADATA_FILE = 'metadata.json'
+COLUMNS_DIR = 'columns'
+
+_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+def write_segment_store(df: pd.DataFrame, store_dir: Union[str, Path],
+                        cluster_col: str = 'CLUSTER',
+                        id_col: str = 'customer_id') -> Path:
+    """Write clustered data as a cluster-sorted columnar store.
+
+    Rows are sorted by cluster and every column is saved as its own .npy
+    file in columns/. Files are named by column position, so a column name
+    can never overwrite an index file or point outside the store. Numeric
+    columns are stored as-is so they can be memory-mapped; other columns
+    are stored as integer codes with their categories kept in the
+    metadata. A cluster-offset index and a sorted id index are written
+    next to the columns.
+
+    Args:
+        df: Dataframe with cluster assignments
+        store_dir: Directory to write the store to
+        cluster_col: Name of the cluster column
+        id_col: Name of the customer id column
+
+    Returns:
+        Path: Directory containing the store
+    """
+    store_path = Path(store_dir)
+    (store_path / COLUMNS_DIR).mkdir(parents=True, exist_ok=True)
+
+    order = np.argsort(df[cluster_col].to_numpy(), kind='stable')
+    df_sorted = df.iloc[order].reset_index(drop=True)
+
+    categories = {}
+    for i, col in enumerate(df_sorted.columns):
+        values = df_sorted[col]
+        column_file = store_path / COLUMNS_DIR / f'{i}.npy'
+        if values.dtype.kind in 'biuf':
+            np.save(column_file, values.to_numpy())
+        else:
+            codes, uniques = pd.factorize(values)
+            np.save(column_file, codes.astype(np.int32))
+            categories[col] = uniques.tolist()
+
+    # Cluster offsets: rows of cluster_values[i] are offsets[i]:offsets[i + 1]
+    cluster_values, counts = np.unique(df_sorted[cluster_col].to_numpy(),
+                                       return_counts=True)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    np.save(store_path / '_cluster_values.npy', cluster_values)
+    np.save(store_path / '_cluster_offsets.npy', offsets)
+
+    if id_col in df_sorted.columns:
+        ids = df_sorted[id_col].to_numpy()
+        id_order = np.argsort(ids, kind='stable')
+        np.save(store_path / '_id_values.npy', ids[id_order])
+        np.save(store_path / '_id_rows.npy', id_order)
+
+    metadata = {
+        'columns': df_sorted.columns.tolist(),
+        'categories': categories,
+        'cluster_col': cluster_col,
+        'id_col': id_col if id_col in df_sorted.columns else None,
+        'n_rows': len(df_sorted)
+    }
+    with open(store_path / METADATA_FILE, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    return store_path
+
+class SegmentStore:
+    """Read-only query interface over a store written by write_segment_store.
+
+    Columns are opened as memory-mapped arrays, so queries only read the
+    rows of the clusters they touch.
+
+    Args:
+        store_dir: Directory containing the store
+    """
+
+    def __init__(self, store_dir: Union[str, Path]):
+        self.path = Path(store_dir)
+        with open(self.path / METADATA_FILE) as f:
+            metadata = json.load(f)
+        self.columns: List[str] = metadata['columns']
+        self.categories: Dict[str, list] = metadata['categories']
+        self.cluster_col: str = metadata['cluster_col']
+        self.id_col: Optional[str] = metadata['id_col']
+        self.n_rows: int = metadata['n_rows']
+
+        self._arrays = {
+            col: np.load(self.path / COLUMNS_DIR / f'{i}.npy', mmap_mode='r')
+            for i, col in enumerate(self.columns)
+        }
+        self.cluster_values = np.load(self.path / '_cluster_values.npy')
+        self._offsets = np.load(self.path / '_cluster_offsets.npy')
+        if self.id_col is not None:
+            self._id_values = np.load(self.path / '_id_values.npy', mmap_mode='r')
+            self._id_rows = np.load(self.path / '_id_rows.npy', mmap_mode='r')
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def cluster_slice(self, cluster) -> slice:
+        """Get the row range holding a cluster.
+
+        Args:
+            cluster: Cluster value as stored in the cluster column
+
+        Returns:
+            slice: Row range of the cluster, empty if it does not exist
+        """
+        i = np.searchsorted(self.cluster_values, cluster)
+        if i == len(self.cluster_values) or self.cluster_values[i] != cluster:
+            return slice(0, 0)
+        return slice(int(self._offsets[i]), int(self._offsets[i + 1]))
+
+    def _decode(self, col: str, values: np.ndarray) -> np.ndarray:
+        """Map stored codes back to the original values of a column."""
+        if col not in self.categories:
+            return np.asarray(values)
+        lookup = np.array(self.categories[col] + [None], dtype=object)
+        return lookup[values]
+
+    def _frame(self, rows: Union[slice, np.ndarray],
+               columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Assemble a dataframe from the given rows of the stored columns."""
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({
+            col: self._decode(col, self._arrays[col][rows]) for col in columns
+        })
+
+    def query_cluster(self, cluster,
+                      filters: Optional[Dict[str, Tuple[str, object]]] = None,
+                      columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get the customers of one cluster, optionally filtered.
+
+        Args:
+            cluster: Cluster value as stored in the cluster column
+            filters: Mapping of column name to (operator, value), e.g.
+                {'avg_utilization_ratio': ('>', 0.8)}; all must hold
+            columns: Columns to return, defaults to all
+
+        Returns:
+            pd.DataFrame: Matching rows of the cluster
+        """
+        rows = self.cluster_slice(cluster)
+        if not filters:
+            return self._frame(rows, columns)
+
+        mask = np.ones(rows.stop - rows.start, dtype=bool)
+        for col, (op, value) in filters.items():
+            if op not in _OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            values = self._decode(col, self._arrays[col][rows])
+            mask &= _OPERATORS[op](values, value)
+        return self._frame(rows.start + np.flatnonzero(mask), columns)
+
+    def lookup(self, customer_ids,
+               columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get the rows of one or more customers by id.
+
+        Args:
+            customer_ids: Customer id or list of ids
+            columns: Columns to return, defaults to all
+
+        Returns:
+            pd.DataFrame: Every row of each id found in the store, in the
+            order the ids were given
+        """
+        if self.id_col is None:
+            raise ValueError("Segment store was written without an id column")
+        ids = np.atleast_1d(customer_ids)
+        # Each id owns the range [left, right) of the sorted id index
+        left = np.searchsorted(self._id_values, ids, side='left')
+        right = np.searchsorted(self._id_values, ids, side='right')
+        counts = right - left
+        out_starts = np.cumsum(counts) - counts
+        positions = np.arange(counts.sum()) + np.repeat(left - out_starts, counts)
+        return self._frame(np.asarray(self._id_rows[positions]), columns)
+
+    def cluster_of(self, customer_id):
+        """Get the cluster of a single customer.
+
+        Args:
+            customer_id: Customer id to look up
+
+        Returns:
+            Cluster of the customer, or None if the id is not in the store
+        """
+        result = self.lookup(customer_id, columns=[self.cluster_col])
+        if result.empty:
+            return None
+        return result[self.cluster_col].iloc[0]
@@ -0,0 +1,84 @@
+"""Tests for hierarchical module."""
+import pytest
+import numpy as np
+import pandas as pd
+from credit_card_segmentation.src.hierarchical import (
+    select_elbow,
+    perform_hierarchical_clustering,
+    get_hierarchical_statistics
+)
+
+@pytest.fixture
+def sample_data():
+    """Create sample data with two clusters of two sub-clusters each."""
+    np.random.seed(42)
+    centers = [(0, 0), (0, 3), (20, 0), (20, 3)]
+    X = np.vstack([np.random.normal(c, 0.3, (15, 2)) for c in centers])
+    labels = np.repeat([0, 1], 30)
+    return X, labels
+
+def test_select_elbow():
+    """Test elbow selection on a curve with a clear bend."""
+    assert select_elbow([100, 20, 15, 12, 10]) == 2
+    assert select_elbow([5.0]) == 1
+
+def test_perform_hierarchical_clustering(sample_data):
+    """Test per-cluster sub-segmentation."""
+    X, labels = sample_data
+    hierarchical_labels, level_stats = perform_hierarchical_clustering(
+        X, labels, max_subclusters=5, n_jobs=2)
+    assert hierarchical_labels.shape == (60, 2)
+    assert np.array_equal(hierarchical_labels[:, 0], labels)
+    assert list(level_stats.index) == [1, 2]
+    assert list(level_stats['n_subclusters']) == [2, 2]
+    assert list(level_stats['size']) == [30, 30]
+    # Each generated sub-cluster should map to a single sub-label
+    for start in range(0, 60, 15):
+        assert len(np.unique(hierarchical_labels[start:start + 15, 1])) == 1
+
+def test_perform_hierarchical_clustering_fixed_k(sample_data):
+    """Test a fixed number of sub-clusters."""
+    X, labels = sample_data
+    hierarchical_labels, level_stats = perform_hierarchical_clustering(
+        X, labels, n_subclusters=3, n_jobs=2)
+    assert list(level_stats['n_subclusters']) == [3, 3]
+    assert set(hierarchical_labels[:, 1]) == {0, 1, 2}
+
+def test_perform_hierarchical_clustering_fixed_k_above_sweep(sample_data):
+    """Test a fixed number of sub-clusters larger than the sweep range."""
+    X, labels = sample_data
+    hierarchical_labels, level_stats = perform_hierarchical_clustering(
+        X, labels, max_subclusters=3, n_subclusters=5, n_jobs=2)
+    assert list(level_stats['n_subclusters']) == [5, 5]
+    assert all(level_stats['inertia'] > 0)
+    assert level_stats['inertias'].isna().all()
+    assert set(hierarchical_labels[:, 1]) == set(range(5))
+
+def test_perform_hierarchical_clustering_single_job(sample_data):
+    """Test the in-process path matches the process pool."""
+    X, labels = sample_data
+    inline_labels, _ = perform_hierarchical_clustering(
+        X, labels, max_subclusters=5, n_jobs=1)
+    pool_labels, _ = perform_hierarchical_clustering(
+        X, labels, max_subclusters=5, n_jobs=2)
+    assert np.array_equal(inline_labels, pool_labels)
+
+def test_perform_hierarchical_clustering_invalid_k(sample_data):
+    """Test a fixed number of sub-clusters below 1 is rejected."""
+    X, labels = sample_data
+    with pytest.raises(ValueError):
+        perform_hierarchical_clustering(X, labels, n_subclusters=0, n_jobs=1)
+
+def test_get_hierarchical_statistics(sample_data):
+    """Test statistics at both levels."""
+    X, labels = sample_data
+    df = pd.DataFrame({'age': X[:, 0], 'income': X[:, 1],
+                       'gender': np.random.choice(['M', 'F'], 60)})
+    hierarchical_labels = np.column_stack([labels, np.tile([0, 1], 30)])
+    cluster_stats, subcluster_stats = get_hierarchical_statistics(
+        df, hierarchical_labels)
+    assert len(cluster_stats) == 2
+    assert len(subcluster_stats) == 4
+    assert subcluster_stats.index.names == ['Cluster', 'Subcluster']
+    assert ('age', 'mean') in subcluster_stats.columns
+    assert ('gender', '') in subcluster_stats.columns
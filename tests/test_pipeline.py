@@ -0,0 +1,118 @@
+"""Tests for pipeline module."""
+import os
+import multiprocessing
+import pytest
+import pandas as pd
+import numpy as np
+import matplotlib
+from credit_card_segmentation.src import pipeline
+from credit_card_segmentation.src.pipeline import (
+    run_analysis,
+    run_batch,
+    read_manifest,
+    expand_inputs
+)
+
+matplotlib.use('Agg')
+
+def make_portfolio(path, n, seed):
+    """Write a sample customer data CSV."""
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        'customer_id': np.arange(n) + 1000,
+        'age': rng.integers(25, 70, n),
+        'gender': rng.choice(['M', 'F'], n),
+        'education_level': rng.choice(['Graduate', 'College', 'High School'], n),
+        'marital_status': rng.choice(['Single', 'Married'], n),
+        'estimated_income': rng.normal(60000, 15000, n),
+        'months_on_book': rng.integers(12, 60, n),
+        'credit_limit': rng.normal(8000, 2000, n),
+        'total_trans_amount': rng.normal(4000, 1000, n),
+        'total_trans_count': rng.integers(10, 120, n),
+        'avg_utilization_ratio': rng.uniform(0, 1, n)
+    }).to_csv(path, index=False)
+    return str(path)
+
+def test_run_analysis(tmp_path):
+    """Test the single portfolio pipeline."""
+    data_path = make_portfolio(tmp_path / 'portfolio.csv', 80, 0)
+    timings = run_analysis(data_path, str(tmp_path / 'out'), n_clusters=3,
+                           max_clusters=4, log=lambda message: None)
+    assert timings['n_rows'] == 80
+    assert set(timings) >= {'load', 'prepare', 'sweep', 'fit', 'report'}
+    assert (tmp_path / 'out' / 'clustered_data.csv').exists()
+    assert (tmp_path / 'out' / 'segment_store').is_dir()
+
+def test_read_manifest_and_expand_inputs(tmp_path):
+    """Test manifest parsing and glob expansion."""
+    a = make_portfolio(tmp_path / 'a.csv', 10, 0)
+    b = make_portfolio(tmp_path / 'b.csv', 10, 1)
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text("# portfolios\nb.csv\n\n*.csv\n")
+    paths = expand_inputs(read_manifest(str(manifest)))
+    assert paths == [b, a]
+
+def test_run_batch(tmp_path):
+    """Test a batch with a failing portfolio and a tight memory budget."""
+    paths = [make_portfolio(tmp_path / 'a.csv', 80, 0),
+             make_portfolio(tmp_path / 'b.csv', 60, 1)]
+    bad = tmp_path / 'bad.csv'
+    bad.write_text("customer_id\n1\n")
+    paths.append(str(bad))
+
+    summary = run_batch(paths, str(tmp_path / 'out'), n_clusters=3,
+                        max_clusters=4, n_jobs=2, memory_budget=0.001,
+                        log=lambda message: None)
+    assert list(summary.index) == ['a', 'b', 'bad']
+    assert list(summary['status'][:2]) == ['ok', 'ok']
+    assert summary.loc['bad', 'status'].startswith('failed')
+    assert summary.loc['a', 'n_rows'] == 80
+    assert (tmp_path / 'out' / 'b' / 'cluster_statistics.csv').exists()
+    assert (tmp_path / 'out' / 'batch_summary.csv').exists()
+
+def test_run_analysis_sub_clusters(tmp_path):
+    """Test sub-clustering gets its own timing stage."""
+    data_path = make_portfolio(tmp_path / 'portfolio.csv', 80, 0)
+    timings = run_analysis(data_path, str(tmp_path / 'out'), n_clusters=3,
+                           max_clusters=4, sub_clusters=True, max_sub_clusters=3,
+                           n_jobs=1, log=lambda message: None)
+    assert 'subcluster' in timings
+    assert (tmp_path / 'out' / 'subcluster_statistics.csv').exists()
+    assert 'SUBCLUSTER' in pd.read_csv(tmp_path / 'out' / 'clustered_data.csv')
+
+def test_run_batch_invalid_inputs(tmp_path):
+    """Test empty and missing inputs are rejected before any work starts."""
+    with pytest.raises(ValueError):
+        run_batch([], str(tmp_path / 'out'))
+    with pytest.raises(ValueError):
+        run_batch([str(tmp_path / 'missing.csv')], str(tmp_path / 'out'))
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='workers must inherit the patched run_analysis')
+def test_run_batch_survives_worker_crash(tmp_path, monkeypatch):
+    """Test a worker dying only fails its own portfolio."""
+    paths = [make_portfolio(tmp_path / 'a.csv', 80, 0),
+             make_portfolio(tmp_path / 'crash.csv', 70, 1),
+             make_portfolio(tmp_path / 'c.csv', 60, 2)]
+
+    def crashing_run_analysis(data_path, *args, **kwargs):
+        if 'crash' in data_path:
+            os._exit(137)
+        return run_analysis(data_path, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, 'run_analysis', crashing_run_analysis)
+    summary = run_batch(paths, str(tmp_path / 'out'), n_clusters=3,
+                        max_clusters=4, n_jobs=2, log=lambda message: None)
+    assert summary.loc['crash', 'status'] == 'failed: worker process died'
+    assert list(summary.loc[['a', 'c'], 'status']) == ['ok', 'ok']
+    assert (tmp_path / 'out' / 'batch_summary.csv').exists()
+
+def test_run_batch_records_memory(tmp_path):
+    """Test the summary records estimated and measured memory."""
+    data_path = make_portfolio(tmp_path / 'a.csv', 80, 0)
+    summary = run_batch([data_path], str(tmp_path / 'out'), n_clusters=3,
+                        max_clusters=4, n_jobs=1, memory_per_file_byte=20,
+                        log=lambda message: None)
+    assert summary.loc['a', 'estimated_mb'] == pytest.approx(
+        os.path.getsize(data_path) * 20 / 2 ** 20)
+    assert summary.loc['a', 'peak_rss_mb'] > 0
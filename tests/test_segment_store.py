@@ -0,0 +1,88 @@
+"""Tests for segment store utilities."""
+import pytest
+import pandas as pd
+import numpy as np
+from credit_card_segmentation.utils.segment_store import (
+    write_segment_store,
+    SegmentStore
+)
+
+@pytest.fixture
+def sample_data():
+    """Create sample clustered data for testing."""
+    np.random.seed(42)
+    return pd.DataFrame({
+        'customer_id': np.random.permutation(100) + 1000,
+        'age': np.random.normal(40, 10, 100),
+        'avg_utilization_ratio': np.random.uniform(0, 1, 100),
+        'gender': np.random.choice(['M', 'F'], 100),
+        'CLUSTER': np.random.randint(1, 5, 100)
+    })
+
+@pytest.fixture
+def store(sample_data, tmp_path):
+    """Write the sample data to a segment store."""
+    return SegmentStore(write_segment_store(sample_data, tmp_path / 'store'))
+
+def test_segment_store_is_cluster_sorted(sample_data, store):
+    """Test rows are laid out by cluster."""
+    assert len(store) == len(sample_data)
+    clusters = np.asarray(store._arrays['CLUSTER'])
+    assert np.all(np.diff(clusters) >= 0)
+    assert isinstance(store._arrays['age'], np.memmap)
+
+def test_query_cluster(sample_data, store):
+    """Test per-cluster queries with filters."""
+    result = store.query_cluster(2)
+    expected = sample_data[sample_data['CLUSTER'] == 2]
+    assert len(result) == len(expected)
+    assert set(result['customer_id']) == set(expected['customer_id'])
+    assert set(result['gender']) <= {'M', 'F'}
+
+    result = store.query_cluster(
+        2, filters={'avg_utilization_ratio': ('>', 0.5), 'gender': ('==', 'F')},
+        columns=['customer_id'])
+    expected = expected[(expected['avg_utilization_ratio'] > 0.5) &
+                        (expected['gender'] == 'F')]
+    assert list(result.columns) == ['customer_id']
+    assert set(result['customer_id']) == set(expected['customer_id'])
+
+    assert store.query_cluster(99).empty
+
+def test_lookup(sample_data, store):
+    """Test point lookups by customer id."""
+    row = sample_data.iloc[7]
+    result = store.lookup(row['customer_id'])
+    assert len(result) == 1
+    assert result['age'].iloc[0] == pytest.approx(row['age'])
+    assert result['gender'].iloc[0] == row['gender']
+    assert store.cluster_of(row['customer_id']) == row['CLUSTER']
+    assert store.cluster_of(-1) is None
+    assert len(store.lookup([1000, 1001, -5])) == 2
+
+def test_column_names_do_not_clash_with_index(tmp_path):
+    """Test columns named like index files or containing '/' are stored safely."""
+    df = pd.DataFrame({
+        'customer_id': [3, 1, 2],
+        '_id_rows': [7.0, 8.0, 9.0],
+        'a/b': ['x', 'y', 'z'],
+        'CLUSTER': [2, 1, 2]
+    })
+    store = SegmentStore(write_segment_store(df, tmp_path / 'store'))
+    assert not (tmp_path / 'a').exists()
+    result = store.lookup(1)
+    assert result['_id_rows'].iloc[0] == 8.0
+    assert result['a/b'].iloc[0] == 'y'
+    assert store.cluster_of(3) == 2
+
+def test_lookup_duplicate_ids(tmp_path):
+    """Test every row of a duplicated id is returned."""
+    df = pd.DataFrame({
+        'customer_id': [5, 7, 5, 9],
+        'age': [30, 40, 50, 60],
+        'CLUSTER': [1, 2, 2, 1]
+    })
+    store = SegmentStore(write_segment_store(df, tmp_path / 'store'))
+    assert sorted(store.lookup(5)['age']) == [30, 50]
+    assert list(store.lookup([9, 5, 4])['customer_id']) == [9, 5, 5]
+    assert store.lookup([]).empty
@@ -0,0 +1,89 @@
+"""Tests for stability module."""
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score
+from credit_card_segmentation.src.clustering import perform_clustering
+from credit_card_segmentation.src.stability import (
+    contingency_table,
+    adjusted_rand_from_contingency,
+    jaccard_from_contingency,
+    assess_cluster_stability,
+    get_stability_summary
+)
+
+@pytest.fixture
+def sample_data():
+    """Create sample data for testing."""
+    np.random.seed(42)
+    # Create 3 distinct clusters
+    cluster1 = np.random.normal(0, 1, (20, 2))
+    cluster2 = np.random.normal(5, 1, (20, 2))
+    cluster3 = np.random.normal(-5, 1, (20, 2))
+    X = np.vstack([cluster1, cluster2, cluster3])
+    return X
+
+def test_adjusted_rand_from_contingency():
+    """Test ARI from contingency table matches scikit-learn."""
+    rng = np.random.default_rng(0)
+    a = rng.integers(0, 4, 200)
+    b = rng.integers(0, 3, 200)
+    table = contingency_table(a, b, 4, 3)
+    assert table.sum() == 200
+    assert adjusted_rand_from_contingency(table) == pytest.approx(
+        adjusted_rand_score(a, b))
+
+def test_jaccard_from_contingency():
+    """Test Jaccard is 1 for permuted identical labelings."""
+    a = np.array([0, 0, 1, 1, 2, 2])
+    b = np.array([2, 2, 0, 0, 1, 1])
+    jaccard = jaccard_from_contingency(contingency_table(a, b, 3, 3))
+    assert np.allclose(jaccard, 1.0)
+
+@pytest.mark.parametrize('method', ['bootstrap', 'subsample'])
+def test_assess_cluster_stability(sample_data, method):
+    """Test stability of well separated clusters."""
+    labels, _ = perform_clustering(sample_data, n_clusters=3)
+    ari, jaccard = assess_cluster_stability(
+        sample_data, labels, n_resamples=6, method=method, n_jobs=2)
+    assert ari.shape == (6,)
+    assert jaccard.shape == (6, 3)
+    assert np.all(ari > 0.9)
+    assert np.all(jaccard > 0.9)
+
+def test_assess_cluster_stability_early_stopping(sample_data):
+    """Test resampling stops once confidence intervals are tight."""
+    labels, _ = perform_clustering(sample_data, n_clusters=3)
+    ari, _ = assess_cluster_stability(
+        sample_data, labels, n_resamples=50, n_jobs=2, tol=0.5, min_resamples=4)
+    # Fits still running when the criterion is met are kept
+    assert 4 <= len(ari) < 4 + 2
+
+def test_get_stability_summary():
+    """Test stability summary layout."""
+    summary = get_stability_summary(np.array([0.8, 0.9]),
+                                    np.array([[0.7, 1.0], [0.9, 1.0]]))
+    assert isinstance(summary, pd.DataFrame)
+    assert list(summary.index) == [1, 2, 'ARI']
+    assert summary.loc[1, 'mean'] == pytest.approx(0.8)
+    assert summary.loc['ARI', 'ci_lower'] < summary.loc['ARI', 'ci_upper']
+
+def test_assess_cluster_stability_one_based_labels(sample_data):
+    """Test 1-based labels are treated like their 0-based equivalent."""
+    labels, _ = perform_clustering(sample_data, n_clusters=3)
+    ari, jaccard = assess_cluster_stability(
+        sample_data, labels + 1, n_resamples=4, n_jobs=2)
+    expected_ari, expected_jaccard = assess_cluster_stability(
+        sample_data, labels, n_resamples=4, n_jobs=2)
+    assert jaccard.shape == (4, 3)
+    assert np.allclose(np.sort(ari), np.sort(expected_ari))
+
+def test_assess_cluster_stability_invalid_arguments(sample_data):
+    """Test invalid resampling arguments are rejected."""
+    labels, _ = perform_clustering(sample_data, n_clusters=3)
+    with pytest.raises(ValueError):
+        assess_cluster_stability(sample_data, labels, n_resamples=0)
+    with pytest.raises(ValueError):
+        assess_cluster_stability(sample_data, labels, method='jackknife')
+    with pytest.raises(ValueError):
+        assess_cluster_stability(sample_data, labels[:-1])